@@ -1,8 +1,12 @@
 """
 Management Command: wipe_db
 Description:
-    This command completely wipes all data from the database.
-    It uses Django's built-in 'flush' command to remove all data from every model.
+    This command wipes all data from the ludwig app's tables.
+    It issues a single TRUNCATE ... RESTART IDENTITY CASCADE over them,
+    which unlinks the heap files in constant time instead of deleting
+    row by row the way Django's 'flush' command does. Framework tables
+    (auth, contenttypes, sessions) are left alone, so the admin site
+    keeps working without a re-migrate.
     You can run it interactively or bypass confirmation using the '--noinput' flag.
 Usage:
     python manage.py wipe_db
@@ -10,12 +14,13 @@ Usage:
 """
 
 import sys
+from django.apps import apps
 from django.core.management.base import BaseCommand
-from django.core import management
+from django.db import connection, transaction
 
 
 class Command(BaseCommand):
-    help = "Wipes EVERYTHING off the database (all data from all models will be deleted)."
+    help = "Wipes all data from the ludwig app's models."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -28,12 +33,25 @@ class Command(BaseCommand):
         noinput = options['noinput']
         if not noinput:
             confirm = input(
-                "WARNING: This will permanently delete ALL data from the database. "
+                "WARNING: This will permanently delete ALL data from the ludwig app's tables. "
                 "Type 'yes' to continue: "
             )
             if confirm.lower() != 'yes':
                 self.stdout.write("Aborting wipe operation.")
                 sys.exit(0)
-        # Execute the flush command with interactive set to False.
-        management.call_command('flush', interactive=False)
-        self.stdout.write(self.style.SUCCESS("Successfully wiped everything off the database."))
+        # Truncate the app's managed model tables in one statement;
+        # RESTART IDENTITY resets the sequences, CASCADE follows foreign
+        # keys. Framework tables (content types, permissions, sessions)
+        # are deliberately untouched — wiping them would leave the admin
+        # unusable until the next migrate.
+        tables = [
+            model._meta.db_table
+            for model in apps.get_app_config('ludwig').get_models()
+            if model._meta.managed and not model._meta.proxy
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'TRUNCATE %s RESTART IDENTITY CASCADE'
+                % ', '.join(connection.ops.quote_name(table) for table in tables)
+            )
+        self.stdout.write(self.style.SUCCESS("Successfully wiped all ludwig data from the database."))
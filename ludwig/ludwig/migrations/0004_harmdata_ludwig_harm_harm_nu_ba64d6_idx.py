@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-08-30 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ludwig', '0003_harmdata_delete_harmonicrecord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='harmdata',
+            index=models.Index(fields=['harm_number', '-p_harm_total'], name='ludwig_harm_harm_nu_ba64d6_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.17 on 2026-08-30 19:47
+
+import ludwig.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ludwig', '0004_harmdata_ludwig_harm_harm_nu_ba64d6_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='harmdata',
+            name='i_prevail_ang_1',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='i_prevail_ang_2',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='i_prevail_ang_3',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='i_prevail_mag_1',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='i_prevail_mag_2',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='i_prevail_mag_3',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='v_prevail_ang_1',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='v_prevail_ang_2',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='v_prevail_ang_3',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='v_prevail_mag_1',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='v_prevail_mag_2',
+            field=ludwig.models.Real32Field(),
+        ),
+        migrations.AlterField(
+            model_name='harmdata',
+            name='v_prevail_mag_3',
+            field=ludwig.models.Real32Field(),
+        ),
+    ]
@@ -1,8 +1,19 @@
 from django.shortcuts import render
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import contextlib
+import hashlib
+import logging
 import os
 from ludwig.scripts import generate_plots as gp  # Import our plotting module
 
+log = logging.getLogger(__name__)
+
+# In DEBUG, warn when a single plot request issues more queries than
+# this; a jump here usually means an N+1 crept into the fetch path.
+QUERY_WARN_THRESHOLD = 5
+
 def generate_plot(request):
     """
     Renders the plot configuration form on GET requests and processes the form
@@ -19,12 +30,29 @@ def generate_plot(request):
             threshold = request.POST.get("threshold", "")
             threshold = float(threshold) if threshold else None
 
-            # Fetch data from the database and generate the plot.
-            df = gp.fetch_data(harm_number, night_mode, threshold)
-            gp.generate_and_save_plots(df, phase, harm_number)
+            # Name the plot after its parameters so identical requests can
+            # reuse the file already on disk instead of re-rendering it.
+            key = hashlib.blake2b(
+                f"{phase}|{harm_number}|{night_mode}|{threshold}".encode(),
+                digest_size=8,
+            ).hexdigest()
+            filename = f"polar_scatter_{phase.replace(' ', '_')}_{harm_number}_{key}.png"
 
-            # Construct the plot filename.
-            filename = f"polar_scatter_{phase.replace(' ', '_')}_{harm_number}.png"
+            if not os.path.exists(os.path.join(gp.OUTPUT_DIR, filename)):
+                capture = (
+                    CaptureQueriesContext(connection) if settings.DEBUG
+                    else contextlib.nullcontext()
+                )
+                with capture:
+                    # Fetch data from the database and generate the plot.
+                    df = gp.fetch_data(harm_number, night_mode, threshold, phase)
+                    gp.generate_and_save_plots(df, phase, harm_number, output_filename=filename)
+                if settings.DEBUG and len(capture) > QUERY_WARN_THRESHOLD:
+                    log.warning(
+                        "generate_plot issued %d queries (threshold %d): %s",
+                        len(capture), QUERY_WARN_THRESHOLD,
+                        [q['sql'] for q in capture.captured_queries],
+                    )
 
             plot_url = f"/static/plots/{filename}"
         except Exception as e: